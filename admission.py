@@ -0,0 +1,90 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class Rejected(Exception):
+    def __init__(self, status, message, retry_after):
+        """Raised when a request is shed; maps directly to an HTTP response"""
+        super().__init__(message)
+        self.status = status
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class RateLimiter:
+    def __init__(self, rate_per_minute=10, burst=5, max_clients=10000):
+        """Per-client token buckets (refill rate_per_minute, capacity burst)"""
+        if rate_per_minute <= 0 or burst < 1:
+            raise ValueError(f"Rate limit needs rate_per_minute > 0 and burst >= 1 (got {rate_per_minute}, {burst})")
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()  # client -> (tokens, last_refill)
+        self._lock = threading.Lock()
+
+    def check(self, client):
+        """Take one token for client or raise Rejected(429)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens < 1:
+                self._buckets[client] = (tokens, now)
+                raise Rejected(429, "Too many questions, please slow down", (1 - tokens) / self.rate)
+            self._buckets[client] = (tokens - 1, now)
+            # Least recently seen clients are evicted first; a fresh bucket is always full anyway
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+
+
+class StageLimiter:
+    def __init__(self, name, concurrency, max_queue, queue_timeout=10.0, retry_after=5):
+        """Bounded concurrency with a bounded wait queue in front of one stage"""
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def load(self):
+        """Fraction of total capacity (running + queued) in use"""
+        with self._cond:
+            return (self.active + self.waiting) / float(self.concurrency + self.max_queue)
+
+    def acquire(self):
+        """Take a slot, waiting in the bounded queue; raise Rejected(503) when saturated"""
+        with self._cond:
+            if self.active < self.concurrency:
+                self.active += 1
+                return
+            if self.waiting >= self.max_queue:
+                raise Rejected(503, f"Server busy ({self.name}), please retry shortly", self.retry_after)
+
+            self.waiting += 1
+            try:
+                deadline = time.monotonic() + self.queue_timeout
+                while self.active >= self.concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Rejected(503, f"Server busy ({self.name}), please retry shortly", self.retry_after)
+                    self._cond.wait(remaining)
+                self.active += 1
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
@@ -0,0 +1,58 @@
+import json
+import os
+import threading
+import time
+from single_flight import normalize_question
+
+ANSWER_CACHE_FILE = "models/answer_cache.json"
+QUESTION_LOG_FILE = "logs/questions.jsonl"
+
+
+class AnswerCache:
+    def __init__(self, path=ANSWER_CACHE_FILE, reload_interval=30):
+        """Pre-generated answers keyed by normalized question, hot-reloaded when the file changes"""
+        self.path = path
+        self.reload_interval = reload_interval
+        self._entries = {}
+        self._mtime = None
+        self._checked = 0
+        self._lock = threading.Lock()
+        self._maybe_reload(force=True)
+
+    def _maybe_reload(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._checked < self.reload_interval:
+            return
+        self._checked = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        with self._lock:
+            self._entries, self._mtime = entries, mtime
+        print(f"✓ Answer cache loaded ({len(entries)} answers)")
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, question):
+        """Cached {"question", "response", "sources", "audio_file"} or None"""
+        self._maybe_reload()
+        return self._entries.get(normalize_question(question))
+
+
+class QuestionLog:
+    def __init__(self, path=QUESTION_LOG_FILE):
+        """Append-only log of live questions, mined by pregenerate.py"""
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def record(self, question):
+        line = json.dumps({"question": question, "ts": time.time()}, ensure_ascii=False)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
@@ -1,10 +1,43 @@
-from flask import Flask, render_template, request, jsonify, send_file, redirect
+from flask import Flask, render_template, request, jsonify, send_file, redirect, Response, make_response
+from werkzeug.middleware.proxy_fix import ProxyFix
 from chatbot import TeacherClone
-from voice_clone_gtts import VoiceClonerGTTS
+from voice_service import open_voice_cloner
+from single_flight import SingleFlight, normalize_question
+from chunked_upload import ChunkedUploadStore, UploadError, MAX_UPLOAD_SIZE
+from ingest_pipeline import IngestPipeline
+from admission import RateLimiter, StageLimiter, Rejected
+from answer_cache import AnswerCache, QuestionLog
+from lecture_audio import lecture_audio_path, read_wav_slice
 import os
 import uuid
 
 app = Flask(__name__)
+# Behind a reverse proxy, set TRUSTED_PROXIES to the number of proxy hops so
+# remote_addr is the student's address from X-Forwarded-For, not the proxy's
+TRUSTED_PROXIES = int(os.getenv("TRUSTED_PROXIES", "0"))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES, x_proto=TRUSTED_PROXIES)
+# Chunks are capped well below this; it only guards the plain form upload
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_SIZE
+
+# Students paste the same question in bursts; share one Gemini/TTS call per key
+response_flight = SingleFlight()
+voice_flight = SingleFlight()
+
+# Admission control: shed load with 429/503 instead of queueing without bound
+rate_limiter = RateLimiter(
+    rate_per_minute=float(os.getenv("CHAT_RATE_PER_MIN", "10")),
+    burst=int(os.getenv("CHAT_BURST", "5"))
+)
+# Students behind one NAT share an IP: each browser gets its own bucket, and a
+# larger per-IP bucket caps what rotating the client cookie can get you
+ip_rate_limiter = RateLimiter(
+    rate_per_minute=float(os.getenv("CHAT_IP_RATE_PER_MIN", "120")),
+    burst=int(os.getenv("CHAT_IP_BURST", "40"))
+)
+chat_stage = StageLimiter("chat", int(os.getenv("CHAT_CONCURRENCY", "8")), int(os.getenv("CHAT_QUEUE", "32")))
+voice_stage = StageLimiter("voice", int(os.getenv("VOICE_CONCURRENCY", "2")), int(os.getenv("VOICE_QUEUE", "4")), queue_timeout=5.0)
+VOICE_SHED_LOAD = 0.5  # Drop voice once the chat stage is this full, before text suffers
 
 print("🚀 Initializing Teacher Clone AI...")
 try:
@@ -15,7 +48,7 @@ except Exception as e:
     teacher_clone = None
 
 try:
-    voice_cloner = VoiceClonerGTTS()
+    voice_cloner = open_voice_cloner()
     print("✓ Voice cloner loaded")
 except Exception as e:
     print(f"✗ Voice cloner failed: {e}")
@@ -23,6 +56,13 @@ except Exception as e:
 
 os.makedirs("static", exist_ok=True)
 
+# Pre-generated answers (pregenerate.py) are served before the live path
+answer_cache = AnswerCache()
+question_log = QuestionLog()
+
+upload_store = ChunkedUploadStore("uploads")
+ingest_pipeline = IngestPipeline()
+
 # Landing page route
 @app.route('/')
 def landing():
@@ -31,13 +71,39 @@ def landing():
 # Chat page route
 @app.route('/chat')
 def chat_page():
-    return render_template('chat.html')
+    response = make_response(render_template('chat.html'))
+    if not request.cookies.get('client_id'):
+        response.set_cookie('client_id', uuid.uuid4().hex, max_age=30 * 24 * 3600, httponly=True, samesite='Lax')
+    return response
 
 # Old route redirect
 @app.route('/index')
 def index():
     return redirect('/chat')
 
+def rejected_response(e):
+    response = jsonify({'error': str(e)})
+    response.status_code = e.status
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+def limited_response(question):
+    with chat_stage:
+        return teacher_clone.get_response_with_sources(question)
+
+def generate_audio_file(text):
+    """Synthesize text into a fresh static/ file and return its name"""
+    with voice_stage:
+        return _generate_audio_file(text)
+
+def _generate_audio_file(text):
+    extension = getattr(voice_cloner, "file_extension", "mp3")
+    filename = f"response_{uuid.uuid4().hex[:8]}.{extension}"
+    output_path = f"static/{filename}"
+    if voice_cloner.generate_voice(text, output_path=output_path):
+        return filename
+    return None
+
 # Chat API endpoint
 @app.route('/chat', methods=['POST'])
 def chat():
@@ -48,29 +114,57 @@ def chat():
         
         if not question:
             return jsonify({'error': 'No question provided'}), 400
+
+        cached = answer_cache.get(question)
+        if cached and (not voice_enabled or cached.get('audio_file')):
+            return jsonify({
+                'response': cached['response'],
+                'sources': cached.get('sources', []),
+                'audio_url': f"/audio/{cached['audio_file']}" if voice_enabled else None,
+                'cached': True
+            })
+
+        ip_rate_limiter.check(request.remote_addr)
+        rate_limiter.check((request.remote_addr, request.cookies.get('client_id', '')))
+        question_log.record(question)
+
+        # Decide before generating text so a busy box never starts new TTS work
+        shed_voice = voice_enabled and chat_stage.load() >= VOICE_SHED_LOAD
         
-        if teacher_clone:
-            response_text = teacher_clone.get_response(question)
+        if cached:
+            # Text is pre-generated, only the voice is missing
+            response_text, sources = cached['response'], cached.get('sources', [])
+        elif teacher_clone:
+            # Coalesced waiters share the leader's chat slot
+            (response_text, sources), _ = response_flight.do(
+                normalize_question(question), limited_response, question
+            )
         else:
-            response_text = "Teacher clone not initialized."
+            response_text, sources = "Teacher clone not initialized.", []
         
         result = {
             'response': response_text,
+            'sources': sources,
             'audio_url': None
         }
         
-        if voice_enabled and voice_cloner:
-            filename = f"response_{uuid.uuid4().hex[:8]}.mp3"
-            output_path = f"static/{filename}"
-            
+        if voice_enabled and voice_cloner and not shed_voice:
             try:
-                voice_cloner.generate_voice(response_text, output_path=output_path)
-                result['audio_url'] = f'/audio/{filename}'
+                filename, _ = voice_flight.do(response_text, generate_audio_file, response_text)
+                if filename:
+                    result['audio_url'] = f'/audio/{filename}'
+            except Rejected:
+                shed_voice = True
             except Exception as e:
                 print(f"Voice generation failed: {e}")
+
+        if shed_voice:
+            result['voice_dropped'] = True
         
         return jsonify(result)
-    
+
+    except Rejected as e:
+        return rejected_response(e)
     except Exception as e:
         print(f"Error: {e}")
         return jsonify({'error': str(e)}), 500
@@ -97,23 +191,85 @@ def upload():
         label = request.form.get('label', 'untitled')
 
         if file:
-            filename = f"{label}_{file.filename}"
-            save_path = os.path.join("uploads", filename)
-            os.makedirs("uploads", exist_ok=True)
-            file.save(save_path)
-            return render_template("upload.html", status=f"✅ File saved: {filename}")
+            # Werkzeug spools multipart bodies to a temp file; save() streams from there
+            save_path = upload_store.save_file(file, label)
+            job_id = ingest_pipeline.submit(save_path)
+            return render_template("upload.html", status=f"✅ File saved: {os.path.basename(save_path)} (ingest job {job_id})")
         else:
             return render_template("upload.html", status="❌ No file selected")
 
     return render_template("upload.html", status="")
 
+@app.route('/upload/init', methods=['POST'])
+def upload_init():
+    """Start a resumable upload; body: {filename, size, label}"""
+    data = request.json or {}
+    try:
+        meta = upload_store.create(data.get('filename'), data.get('size', 0), data.get('label') or 'untitled')
+        return jsonify(meta)
+    except (UploadError, ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/upload/<upload_id>', methods=['GET', 'PUT'])
+def upload_chunk(upload_id):
+    """GET returns the resume offset; PUT appends raw bytes at ?offset="""
+    try:
+        if request.method == 'GET':
+            return jsonify(upload_store.status(upload_id))
+        offset = int(request.args.get('offset', -1))
+        meta = upload_store.write_chunk(upload_id, offset, request.stream, request.content_length)
+        return jsonify(meta)
+    except UploadError as e:
+        return jsonify({'error': str(e)}), 409
+    except ValueError:
+        return jsonify({'error': 'Invalid offset'}), 400
+
+@app.route('/upload/<upload_id>/complete', methods=['POST'])
+def upload_complete(upload_id):
+    """Finalize an upload and hand it to the background ingest pipeline"""
+    try:
+        save_path, job_id = upload_store.complete(upload_id, ingest_pipeline.submit)
+    except UploadError as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify({'job_id': job_id, 'file': os.path.basename(save_path)})
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = ingest_pipeline.status(job_id)
+    if not job:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job)
+
 @app.route('/audio/<filename>')
 def serve_audio(filename):
     try:
-        return send_file(f'static/{filename}', mimetype='audio/mpeg')
+        mimetype = 'audio/wav' if filename.endswith('.wav') else 'audio/mpeg'
+        return send_file(f'static/{filename}', mimetype=mimetype)
     except Exception as e:
         return "Audio not found", 404
 
+@app.route('/lecture_audio/<filename>')
+def lecture_audio(filename):
+    """Serve only the [start, end) seconds of a lecture WAV"""
+    path = lecture_audio_path(filename)
+    if not path:
+        return "Lecture audio not found", 404
+    try:
+        start = max(0.0, float(request.args.get('start', 0)))
+        end = float(request.args.get('end', start + 30))
+    except ValueError:
+        return "Invalid start/end", 400
+    if end <= start:
+        return "Invalid start/end", 400
+
+    try:
+        clip = read_wav_slice(path, start, end)
+    except ValueError as e:
+        return str(e), 415
+    response = Response(clip, mimetype='audio/wav')
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response
+
 if __name__ == '__main__':
     print("\n" + "="*50)
     print("🎓 Gate Smashers AI Clone Server")
@@ -1,10 +1,10 @@
 import google.generativeai as genai
-from langchain.vectorstores import Chroma
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_huggingface import HuggingFaceEmbeddings
 import json
 import os
 from dotenv import load_dotenv
+from lecture_audio import sources_from_docs
+from knowledge_base import open_vector_store
 
 load_dotenv()
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
@@ -16,25 +16,31 @@ class TeacherClone:
             self.style = json.load(f)
         
         # Load vector DB
-        embeddings = HuggingFaceEmbeddings(
-            model="sentence-transformers/all-MiniLM-L6-v2"
-        )
-        self.vectordb = Chroma(
-            persist_directory="./chroma_db",
-            embedding_function=embeddings
-        )
+        if os.getenv("RETRIEVAL_SERVICE") == "1":
+            # Multi-worker mode: embedding + search live in retrieval_service.py,
+            # started here if no worker has started it yet
+            from retrieval_service import RemoteRetriever
+            self.vectordb = RemoteRetriever(spawn=True)
+        else:
+            self.vectordb = open_vector_store()
         
         # Initialize Gemini
         self.model = genai.GenerativeModel('models/gemini-2.5-pro')
    
     def get_response(self, question, use_rag=True):
         """Generate response in teacher's style"""
+        return self.get_response_with_sources(question, use_rag)[0]
+
+    def get_response_with_sources(self, question, use_rag=True):
+        """Generate response plus lecture/timestamp references for the retrieved context"""
         
         # Retrieve relevant context
         context = ""
+        sources = []
         if use_rag:
             docs = self.vectordb.similarity_search(question, k=3)
             context = "\n\n".join([doc.page_content for doc in docs])
+            sources = sources_from_docs(docs)
         
         # Create prompt
         system_prompt = f"""You are an AI clone of Gate Smashers teacher. 
@@ -69,7 +75,7 @@ Answer as Gate Smashers would teach this:"""
 
         # Generate response
         response = self.model.generate_content(system_prompt)
-        return response.text
+        return response.text, sources
 
 # Test
 if __name__ == "__main__":
@@ -0,0 +1,123 @@
+import json
+import os
+import re
+import uuid
+from file_lock import FileLock
+
+CHUNK_COPY_SIZE = 1024 * 1024  # Bytes read from the request stream at a time
+MAX_UPLOAD_SIZE = 4 * 1024 * 1024 * 1024  # 4 GB per lecture
+
+
+class UploadError(Exception):
+    pass
+
+
+def safe_filename(name):
+    """Strip path components and odd characters from a client filename"""
+    name = os.path.basename(name or "upload")
+    name = re.sub(r"[^\w.\- ]", "_", name).strip()
+    return name or "upload"
+
+
+class ChunkedUploadStore:
+    def __init__(self, upload_dir="uploads"):
+        """Resumable uploads written chunk-by-chunk straight to disk"""
+        self.upload_dir = upload_dir
+        os.makedirs(upload_dir, exist_ok=True)
+
+    def _meta_path(self, upload_id):
+        return os.path.join(self.upload_dir, f"{upload_id}.json")
+
+    def _part_path(self, upload_id):
+        return os.path.join(self.upload_dir, f"{upload_id}.part")
+
+    def _upload_lock(self, upload_id):
+        # Per-upload and cross-process, so web workers sharing uploads/ agree too
+        return FileLock(os.path.join(self.upload_dir, f"{upload_id}.lock"))
+
+    def _check_id(self, upload_id):
+        if not re.fullmatch(r"[0-9a-f]{32}", upload_id or ""):
+            raise UploadError("Invalid upload id")
+
+    def create(self, filename, size, label="untitled"):
+        """Register a new upload and return its metadata"""
+        size = int(size)
+        if size <= 0 or size > MAX_UPLOAD_SIZE:
+            raise UploadError(f"Upload size must be between 1 byte and {MAX_UPLOAD_SIZE} bytes")
+
+        upload_id = uuid.uuid4().hex
+        meta = {
+            "upload_id": upload_id,
+            "filename": f"{safe_filename(label)}_{safe_filename(filename)}",
+            "size": size,
+            "complete": False
+        }
+        open(self._part_path(upload_id), "wb").close()
+        with open(self._meta_path(upload_id), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        return self.status(upload_id)
+
+    def status(self, upload_id):
+        """Metadata plus how many bytes are already on disk (the resume offset)"""
+        self._check_id(upload_id)
+        try:
+            with open(self._meta_path(upload_id), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            raise UploadError("Unknown upload id")
+
+        part = self._part_path(upload_id)
+        meta["received"] = os.path.getsize(part) if os.path.exists(part) else meta["size"]
+        return meta
+
+    def write_chunk(self, upload_id, offset, stream, length):
+        """Append one chunk from a file-like stream at the expected offset"""
+        # Locked per upload id, so a slow client only ever blocks its own upload
+        with self._upload_lock(upload_id):
+            meta = self.status(upload_id)
+            if meta["complete"]:
+                raise UploadError("Upload already completed")
+            if offset != meta["received"]:
+                # Client is out of sync; it should resume from meta["received"]
+                raise UploadError(f"Expected offset {meta['received']}, got {offset}")
+            if length is None or length <= 0 or offset + length > meta["size"]:
+                raise UploadError("Chunk exceeds declared upload size")
+
+            with open(self._part_path(upload_id), "ab") as f:
+                remaining = length
+                while remaining > 0:
+                    block = stream.read(min(CHUNK_COPY_SIZE, remaining))
+                    if not block:
+                        break
+                    f.write(block)
+                    remaining -= len(block)
+
+        return self.status(upload_id)
+
+    def save_file(self, file, label="untitled"):
+        """Non-resumable path for plain form uploads (a werkzeug FileStorage)"""
+        final_path = os.path.join(self.upload_dir, f"{safe_filename(label)}_{safe_filename(file.filename)}")
+        file.save(final_path, buffer_size=CHUNK_COPY_SIZE)
+        return final_path
+
+    def complete(self, upload_id, on_complete):
+        """Move a fully received upload to its final name and start processing it once.
+
+        on_complete(final_path) returns a job id, which is stored in the meta
+        file; repeated calls return the same (final_path, job_id) instead of
+        starting a second job.
+        """
+        with self._upload_lock(upload_id):
+            meta = self.status(upload_id)
+            final_path = os.path.join(self.upload_dir, meta["filename"])
+            if meta["complete"]:
+                return final_path, meta.get("job_id")
+            if meta["received"] != meta["size"]:
+                raise UploadError(f"Upload incomplete: {meta['received']}/{meta['size']} bytes")
+
+            os.replace(self._part_path(upload_id), final_path)
+            meta["complete"] = True
+            meta["job_id"] = on_complete(final_path)
+            with open(self._meta_path(upload_id), "w", encoding="utf-8") as f:
+                json.dump({k: v for k, v in meta.items() if k != "received"}, f)
+            return final_path, meta["job_id"]
@@ -1,26 +1,112 @@
 import yt_dlp
 import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
-def download_videos(playlist_url, max_videos=6):
-    """Download first N videos from playlist"""
-    
-    ydl_opts = {
+ARCHIVE_FILE = "videos/download_archive.txt"
+MEDIA_EXTENSIONS = {".mp4", ".mkv", ".webm", ".mov", ".m4a", ".mp3", ".wav", ".aac", ".flac", ".ogg", ".opus"}
+
+class DownloadArchive:
+    def __init__(self, path=ARCHIVE_FILE):
+        """Completed item ids, one per line (same format yt-dlp's download_archive uses)"""
+        self.path = path
+        self._lock = threading.Lock()
+        self._done = set()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self._done = {line.strip() for line in f if line.strip()}
+
+    def __contains__(self, item_id):
+        return item_id in self._done
+
+    def add(self, item_id):
+        with self._lock:
+            if item_id in self._done:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(item_id + "\n")
+            self._done.add(item_id)
+
+def _ydl_opts(output_dir, fragments, local_files=False):
+    return {
         'format': 'bestaudio/best',
-        'outtmpl': 'videos/%(title)s.%(ext)s',
+        'outtmpl': f'{output_dir}/%(title)s.%(ext)s',
         'postprocessors': [{
             'key': 'FFmpegExtractAudio',
             'preferredcodec': 'wav',
         }],
-        'playlistend': max_videos,  # Only first 6 videos
-        'quiet': False,
+        # Write what Whisper actually consumes: 16 kHz mono
+        'postprocessor_args': {'extractaudio': ['-ar', '16000', '-ac', '1']},
+        'concurrent_fragment_downloads': fragments,
+        # file:// is off by default in yt-dlp; only allow it for our own directory listings
+        'enable_file_urls': local_files,
+        'quiet': True,
+        'noprogress': True,
     }
-    
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        print(f"Downloading {max_videos} videos...")
-        ydl.download([playlist_url])
-    
-    print("✓ Videos downloaded successfully!")
+
+def _archive_id(entry):
+    return f"{entry.get('ie_key', 'youtube').lower()} {entry['id']}"
+
+def _local_entries(source_dir, max_videos):
+    """Playlist-style entries (file:// URLs) for a directory of media files"""
+    files = sorted(p for p in Path(source_dir).iterdir() if p.suffix.lower() in MEDIA_EXTENSIONS)[:max_videos]
+    entries = []
+    for path in files:
+        stat = path.stat()
+        entries.append({
+            'ie_key': 'Local',
+            # Size and mtime in the id, so a replaced file is converted again
+            'id': f"{path.name}:{stat.st_size}:{int(stat.st_mtime)}",
+            'url': path.resolve().as_uri(),
+            'title': path.stem,
+        })
+    return entries
+
+def _download_item(entry, output_dir, archive, fragments, local_files=False):
+    url = entry.get('url') or entry['id']
+    with yt_dlp.YoutubeDL(_ydl_opts(output_dir, fragments, local_files)) as ydl:
+        ydl.download([url])
+    archive.add(_archive_id(entry))
+    print(f"✓ {entry.get('title', entry['id'])}")
+
+def download_videos(playlist_url, max_videos=6, workers=4, fragments=4, output_dir="videos", archive_path=ARCHIVE_FILE):
+    """Download first N videos from a playlist (or a local directory of media files)
+
+    Items run in parallel, each with parallel fragment downloads; items already
+    listed in the download archive are skipped so reruns resume where they stopped.
+    A local directory goes through the same yt-dlp path via file:// URLs.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    archive = DownloadArchive(archive_path)
+
+    local_files = os.path.isdir(playlist_url)
+    if local_files:
+        entries = _local_entries(playlist_url, max_videos)
+    else:
+        # List the playlist without downloading so items can be fanned out
+        with yt_dlp.YoutubeDL({'extract_flat': 'in_playlist', 'playlistend': max_videos, 'quiet': True}) as ydl:
+            info = ydl.extract_info(playlist_url, download=False)
+        entries = list(info.get('entries') or [info])[:max_videos]
+
+    todo = [e for e in entries if _archive_id(e) not in archive]
+    print(f"Downloading {len(todo)} videos ({len(entries) - len(todo)} already done)...")
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_download_item, e, output_dir, archive, fragments, local_files) for e in todo]
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                print(f"✗ Download failed: {e}")
+
+    print(f"✓ Videos downloaded successfully! ({failed} failed)" if failed else "✓ Videos downloaded successfully!")
+    return len(todo) - failed
 
 if __name__ == "__main__":
-    playlist = "https://www.youtube.com/playlist?list=PLxCzCOWd7aiEszeDTf1kW3uF-Yy-MFjw8"
-    download_videos(playlist, max_videos=6)
\ No newline at end of file
+    playlist = sys.argv[1] if len(sys.argv) > 1 else "https://www.youtube.com/playlist?list=PLxCzCOWd7aiEszeDTf1kW3uF-Yy-MFjw8"
+    download_videos(playlist, max_videos=6)
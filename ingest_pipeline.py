@@ -0,0 +1,121 @@
+import json
+import os
+import queue
+import re
+import subprocess
+import threading
+import time
+import uuid
+from pathlib import Path
+from file_lock import FileLock
+
+STAGES = ["queued", "extracting_audio", "transcribing", "embedding", "done"]
+JOBS_DIR = "uploads/jobs"
+
+
+def extract_audio(input_path, output_dir="videos"):
+    """Extract 16 kHz mono WAV (what Whisper needs) from an uploaded file"""
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, f"{Path(input_path).stem}.wav")
+    subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error", "-i", str(input_path),
+         "-vn", "-ac", "1", "-ar", "16000", output_path],
+        check=True
+    )
+    return output_path
+
+
+class IngestPipeline:
+    def __init__(self, jobs_dir=JOBS_DIR):
+        """Background worker: audio extraction -> transcription -> embedding
+
+        Each job's state is a JSON file in jobs_dir, so any web worker can
+        report on a job another worker accepted.
+        """
+        self.jobs_dir = jobs_dir
+        os.makedirs(jobs_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._whisper = None
+        self._embeddings = None
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def _job_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _write(self, job):
+        path = self._job_path(job["job_id"])
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(job, f)
+        os.replace(tmp, path)
+
+    def submit(self, media_path):
+        """Queue an uploaded file for ingestion and return its job id"""
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._write({
+                "job_id": job_id,
+                "file": os.path.basename(media_path),
+                "stage": "queued",
+                "error": None,
+                "chunks_added": 0,
+                "submitted_at": time.time(),
+                "finished_at": None
+            })
+        self._queue.put((job_id, media_path))
+        return job_id
+
+    def status(self, job_id):
+        if not re.fullmatch(r"[0-9a-f]{12}", job_id or ""):
+            return None
+        try:
+            with open(self._job_path(job_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _set(self, job_id, **fields):
+        # Only the process that accepted a job ever updates it
+        with self._lock:
+            job = self.status(job_id)
+            job.update(fields)
+            self._write(job)
+
+    def _run(self):
+        # One job at a time: Whisper and the embedder are both CPU-bound
+        while True:
+            job_id, media_path = self._queue.get()
+            try:
+                # Across web workers too: each would otherwise run its own Whisper
+                # and write to the transcript store and Chroma at the same time
+                with FileLock(os.path.join(self.jobs_dir, "ingest.lock")):
+                    self._process(job_id, media_path)
+            except Exception as e:
+                print(f"✗ Ingest job {job_id} failed: {e}")
+                self._set(job_id, stage="failed", error=str(e), finished_at=time.time())
+            finally:
+                self._queue.task_done()
+
+    def _process(self, job_id, media_path):
+        from transcribe import load_whisper_model, transcribe_file
+        from transcript_store import TranscriptStore
+        from knowledge_base import add_to_knowledge_base, get_embeddings
+
+        self._set(job_id, stage="extracting_audio")
+        audio_path = extract_audio(media_path)
+
+        self._set(job_id, stage="transcribing")
+        if self._whisper is None:
+            self._whisper = load_whisper_model("small")
+        transcript = transcribe_file(self._whisper, audio_path)
+        TranscriptStore().append_transcript(transcript)
+
+        self._set(job_id, stage="embedding")
+        if self._embeddings is None:
+            self._embeddings = get_embeddings()
+        added = add_to_knowledge_base([transcript], embeddings=self._embeddings)
+
+        self._set(job_id, stage="done", chunks_added=added, finished_at=time.time())
+        print(f"✓ Ingested {os.path.basename(media_path)} ({added} chunks)")
@@ -1,28 +1,25 @@
-import json
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 from langchain.docstore.document import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import HuggingFaceEmbeddings
+from transcript_store import open_store
 # Optional: Gemini fallback
 # from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
 load_dotenv()
 
-def create_knowledge_base():
-    """Create vector database from transcripts"""
-
-    # Load transcripts
-    with open("transcripts/combined.json", 'r', encoding='utf-8') as f:
-        transcripts = json.load(f)
+PERSIST_DIRECTORY = "./chroma_db"
+# Touched after every write so long-running readers (other web workers,
+# the retrieval service) know to reopen their index
+UPDATED_MARKER = os.path.join(PERSIST_DIRECTORY, ".updated")
 
-    for i, t in enumerate(transcripts):
-        if "file" not in t:
-            print(f"⚠️ Transcript {i} missing 'file' key")
-
-    # Create documents
+def transcripts_to_documents(transcripts):
+    """Turn transcript dicts into split, metadata-tagged chunks"""
     documents = []
     for transcript in transcripts:
         for segment in transcript.get("segments", []):
@@ -45,12 +42,86 @@ def create_knowledge_base():
     )
     splits = text_splitter.split_documents(documents)
     print(f"🔪 Split into {len(splits)} chunks")
+    return splits
 
+def get_embeddings():
     # Create embeddings (Hugging Face default)
-    embeddings = HuggingFaceEmbeddings(
+    return HuggingFaceEmbeddings(
         model_name="sentence-transformers/all-MiniLM-L6-v2"
     )
 
+def _open_index(embeddings):
+    if os.getenv("VECTOR_INDEX", "chroma") == "quantized":
+        from quantized_index import QuantizedIndex
+        return QuantizedIndex(embeddings)
+    try:
+        # Chroma caches one client per path in-process; drop it to see other processes' writes
+        from chromadb.api.client import SharedSystemClient
+        SharedSystemClient.clear_system_cache()
+    except (ImportError, AttributeError):
+        pass
+    return Chroma(
+        persist_directory=PERSIST_DIRECTORY,
+        embedding_function=embeddings
+    )
+
+def _marker_mtime():
+    try:
+        return os.path.getmtime(UPDATED_MARKER)
+    except OSError:
+        return None
+
+def mark_index_updated():
+    os.makedirs(PERSIST_DIRECTORY, exist_ok=True)
+    with open(UPDATED_MARKER, "a"):
+        pass
+    os.utime(UPDATED_MARKER)
+
+def refresh_quantized_index():
+    """Rebuild the quantized index from Chroma when it is the one being served"""
+    if os.getenv("VECTOR_INDEX", "chroma") == "quantized":
+        from quantized_index import build_from_chroma
+        build_from_chroma(PERSIST_DIRECTORY)
+
+class ReloadingVectorStore:
+    def __init__(self, embeddings, check_interval=30):
+        """Vector store that reopens itself when UPDATED_MARKER changes"""
+        self.embeddings = embeddings
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = _marker_mtime()
+        self._checked = time.monotonic()
+        self._store = _open_index(embeddings)
+
+    def _current(self):
+        now = time.monotonic()
+        if now - self._checked >= self.check_interval:
+            with self._lock:
+                self._checked = now
+                mtime = _marker_mtime()
+                if mtime != self._mtime:
+                    self._store = _open_index(self.embeddings)
+                    self._mtime = mtime
+                    print("✓ Vector index reloaded")
+        return self._store
+
+    def similarity_search(self, query, k=3):
+        return self._current().similarity_search(query, k=k)
+
+    def similarity_search_by_vector(self, embedding, k=3):
+        return self._current().similarity_search_by_vector(embedding, k=k)
+
+def open_vector_store(embeddings=None):
+    """Open the retrieval index selected by VECTOR_INDEX (chroma | quantized)"""
+    return ReloadingVectorStore(embeddings or get_embeddings())
+
+def create_knowledge_base():
+    """Create vector database from transcripts"""
+
+    # Stream transcripts one lecture at a time from the compact store
+    store = open_store()
+    embeddings = get_embeddings()
+
     # Optional Gemini fallback (commented out)
     # embeddings = GoogleGenerativeAIEmbeddings(
     #     model="models/embedding-001",
@@ -58,16 +129,40 @@ def create_knowledge_base():
     # )
 
     # Create vector store
-    vectordb = Chroma.from_documents(
-        documents=splits,
-        embedding=embeddings,
-        persist_directory="./chroma_db"
+    vectordb = Chroma(
+        persist_directory=PERSIST_DIRECTORY,
+        embedding_function=embeddings
     )
+    for transcript in store.iter_transcripts():
+        splits = transcripts_to_documents([transcript])
+        if splits:
+            vectordb.add_documents(splits)
 
     vectordb.persist()
+    refresh_quantized_index()
+    mark_index_updated()
     print("✅ Knowledge base created successfully!")
 
     return vectordb
 
+def add_to_knowledge_base(transcripts, embeddings=None):
+    """Embed new transcripts into the existing store without rebuilding it"""
+    splits = transcripts_to_documents(transcripts)
+    vectordb = Chroma(
+        persist_directory=PERSIST_DIRECTORY,
+        embedding_function=embeddings or get_embeddings()
+    )
+    # A re-uploaded lecture replaces its old chunks instead of sitting next to them
+    for file in {t.get("file", "unknown") for t in transcripts}:
+        vectordb._collection.delete(where={"file": file})
+    if splits:
+        vectordb.add_documents(splits)
+        vectordb.persist()
+    # Readers only see the new chunks once the served index is rebuilt and the marker moves
+    refresh_quantized_index()
+    mark_index_updated()
+    print(f"✅ Added {len(splits)} chunks to knowledge base")
+    return len(splits)
+
 if __name__ == "__main__":
     create_knowledge_base()
\ No newline at end of file
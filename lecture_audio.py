@@ -0,0 +1,103 @@
+import os
+import struct
+from urllib.parse import quote
+
+LECTURE_AUDIO_DIR = "videos"
+MIN_CLIP_SECONDS = 30     # Short retrieved chunks are widened to roughly this much context
+MAX_CLIP_SECONDS = 180
+MERGE_GAP_SECONDS = 15    # Chunks of the same lecture closer than this become one source
+
+
+def _fmt_time(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def sources_from_docs(docs):
+    """Lecture/timestamp references from retrieved chunks' metadata (no extra lookups)"""
+    by_file = {}
+    for doc in docs:
+        meta = doc.metadata or {}
+        if "file" not in meta:
+            continue
+        by_file.setdefault(meta["file"], []).append((float(meta.get("start", 0)), float(meta.get("end", 0))))
+
+    sources = []
+    for file, ranges in by_file.items():
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start - merged[-1][1] <= MERGE_GAP_SECONDS:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        for start, end in merged:
+            # Centre a MIN_CLIP_SECONDS window on very short chunks
+            if end - start < MIN_CLIP_SECONDS:
+                middle = (start + end) / 2
+                start, end = max(0.0, middle - MIN_CLIP_SECONDS / 2), middle + MIN_CLIP_SECONDS / 2
+            # read_wav_slice never plays more than MAX_CLIP_SECONDS, so don't advertise more
+            end = min(end, start + MAX_CLIP_SECONDS)
+            sources.append({
+                "lecture": os.path.splitext(file)[0],
+                "file": file,
+                "start": round(start, 2),
+                "end": round(end, 2),
+                "label": f"{_fmt_time(start)}–{_fmt_time(end)}",
+                "audio_url": f"/lecture_audio/{quote(file, safe='')}?start={start:.2f}&end={end:.2f}",
+            })
+    return sources
+
+
+def _read_wav_layout(f):
+    """Return (fmt chunk bytes, byte rate, block align, data offset, data size) by walking RIFF headers"""
+    riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+    if riff != b"RIFF" or wave != b"WAVE":
+        raise ValueError("Not a WAV file")
+
+    fmt = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            raise ValueError("WAV file has no data chunk")
+        chunk_id, size = struct.unpack("<4sI", header)
+        if chunk_id == b"fmt ":
+            fmt = f.read(size)
+            if size % 2:
+                f.seek(1, os.SEEK_CUR)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data before fmt chunk")
+            _, _, _, byte_rate, block_align = struct.unpack("<HHIIH", fmt[:14])
+            return fmt, byte_rate, block_align, f.tell(), size
+        else:
+            f.seek(size + (size % 2), os.SEEK_CUR)
+
+
+def read_wav_slice(path, start, end):
+    """WAV bytes for [start, end) seconds, reading only the headers and that byte range"""
+    end = min(end, start + MAX_CLIP_SECONDS)
+    with open(path, "rb") as f:
+        fmt, byte_rate, block_align, data_offset, data_size = _read_wav_layout(f)
+
+        # Align to whole sample frames
+        first = int(start * byte_rate) // block_align * block_align
+        last = int(end * byte_rate) // block_align * block_align
+        first, last = min(first, data_size), min(last, data_size)
+
+        f.seek(data_offset + first)
+        data = f.read(last - first)
+
+    header = b"RIFF" + struct.pack("<I", 4 + 8 + len(fmt) + 8 + len(data)) + b"WAVE"
+    header += b"fmt " + struct.pack("<I", len(fmt)) + fmt
+    header += b"data" + struct.pack("<I", len(data))
+    return header + data
+
+
+def lecture_audio_path(file):
+    """Resolve a lecture file name to its WAV in LECTURE_AUDIO_DIR, refusing anything else"""
+    name = os.path.basename(file)
+    if name != file or not name.lower().endswith(".wav"):
+        return None
+    path = os.path.join(LECTURE_AUDIO_DIR, name)
+    return path if os.path.isfile(path) else None
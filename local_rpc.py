@@ -0,0 +1,225 @@
+import os
+import queue
+import secrets
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from file_lock import FileLock
+
+KEY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".local_rpc_key")
+
+
+def _load_authkey():
+    """LOCAL_RPC_KEY, or a random per-checkout key kept in a 0600 file.
+
+    multiprocessing.connection unpickles what it receives, so the key must
+    never be a value that is known outside this machine.
+    """
+    key = os.getenv("LOCAL_RPC_KEY")
+    if key:
+        return key.encode("utf-8")
+
+    if not os.path.exists(KEY_FILE):
+        # Write privately then link into place, so concurrent first starts agree on one key
+        tmp = f"{KEY_FILE}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+        try:
+            os.link(tmp, KEY_FILE)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp)
+
+    with open(KEY_FILE, "r") as f:
+        key = f.read().strip()
+    if not key:
+        raise RuntimeError(f"{KEY_FILE} is empty; delete it or set LOCAL_RPC_KEY")
+    return key.encode("utf-8")
+
+
+AUTHKEY = _load_authkey()
+
+
+class RpcError(Exception):
+    pass
+
+
+_DISCONNECTED = "worker disconnected"
+
+
+def serve_forever(address, handle, name):
+    """Accept clients forever, one thread each; handle(reply, request_id, payload) takes every request.
+
+    reply(request_id, result, error) may be called later from any thread.
+    """
+    with Listener(address, authkey=AUTHKEY) as listener:
+        print(f"✓ {name} listening on {address[0]}:{address[1]}")
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, AuthenticationError) as e:
+                # A client with the wrong key (or one that hung up mid-handshake) must not stop the server
+                print(f"✗ Rejected connection: {e}")
+                continue
+            threading.Thread(target=_serve_connection, args=(conn, handle), daemon=True).start()
+
+
+def _serve_connection(conn, handle):
+    send_lock = threading.Lock()
+
+    def reply(request_id, result, error):
+        with send_lock:
+            try:
+                conn.send((request_id, result, error))
+            except OSError:
+                pass  # Client exited; drop the reply
+
+    try:
+        while True:
+            request_id, payload = conn.recv()
+            handle(reply, request_id, payload)
+    except (EOFError, OSError):
+        pass  # Client closed the connection, or died without closing it
+    finally:
+        conn.close()
+
+
+class RpcClient:
+    def __init__(self, address, server_script=None, startup_timeout=600):
+        """Thread-safe client for a local worker speaking (request_id, payload) messages.
+
+        Many threads share one connection; a dispatcher thread routes each
+        (request_id, result, error) reply back to the caller waiting on it.
+        If nothing is listening and server_script is given, it is started as
+        `python <server_script> serve`; a lock file makes sure only one of
+        several processes starting at once spawns it. When the worker goes
+        away, the next call reconnects (respawning it the same way).
+        """
+        self.address = address
+        self.server_script = server_script
+        self.startup_timeout = startup_timeout
+        self._pending = {}  # request_id -> (connection, waiter)
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self.process = None
+        self._conn = None
+        # Connect eagerly so a missing worker fails at startup, not on the first request
+        with self._send_lock:
+            self._connection()
+
+    def _connection(self):
+        """Live connection, reconnecting if the last one died; caller holds _send_lock"""
+        conn = self._conn
+        if conn is None:
+            conn = self._connect(self.address, self.server_script, self.startup_timeout)
+            with self._lock:
+                self._conn = conn
+            threading.Thread(target=self._dispatch, args=(conn,), daemon=True).start()
+        return conn
+
+    def _connect(self, address, server_script, startup_timeout):
+        try:
+            return Client(address, authkey=AUTHKEY)
+        except ConnectionRefusedError:
+            if not server_script:
+                raise
+
+        script = os.path.abspath(server_script)
+        lock_path = os.path.join(os.path.dirname(script), f".{os.path.basename(script)}.spawn.lock")
+        with FileLock(lock_path):
+            # Another process may have started the server while we waited for the lock
+            try:
+                return Client(address, authkey=AUTHKEY)
+            except ConnectionRefusedError:
+                return self._spawn(address, script, startup_timeout)
+
+    def _spawn(self, address, script, startup_timeout):
+        self.process = subprocess.Popen([sys.executable, script, "serve"], cwd=os.path.dirname(script))
+        deadline = time.time() + startup_timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"{os.path.basename(script)} exited during startup")
+            try:
+                return Client(address, authkey=AUTHKEY)
+            except ConnectionRefusedError:
+                time.sleep(1)
+        raise RuntimeError(f"{os.path.basename(script)} did not start in time")
+
+    def _drop(self, conn):
+        """Forget a dead connection and fail the calls still waiting on it"""
+        with self._lock:
+            if self._conn is conn:
+                self._conn = None
+            dead = [request_id for request_id, (c, _) in self._pending.items() if c is conn]
+            waiters = [self._pending.pop(request_id)[1] for request_id in dead]
+        conn.close()
+        for waiter in waiters:
+            waiter.put((None, _DISCONNECTED))
+
+    def _dispatch(self, conn):
+        while True:
+            try:
+                request_id, result, error = conn.recv()
+            except (EOFError, OSError):
+                self._drop(conn)
+                return
+            with self._lock:
+                _, waiter = self._pending.pop(request_id, (None, None))
+            if waiter is not None:
+                waiter.put((result, error))
+
+    def _send(self, request_id, payload):
+        """Register a waiter and send; returns the waiter or raises OSError"""
+        waiter = queue.Queue(maxsize=1)
+        with self._send_lock:
+            conn = self._connection()
+            with self._lock:
+                self._pending[request_id] = (conn, waiter)
+            try:
+                conn.send((request_id, payload))
+            except OSError:
+                self._drop(conn)
+                raise
+        return waiter
+
+    def call(self, payload, timeout=300):
+        """Send one request and block until its reply; raises RpcError on failure.
+
+        A request that meets a dead connection (the worker restarted since the
+        last call) is sent once more over a fresh one.
+        """
+        for attempt in range(2):
+            request_id = uuid.uuid4().hex
+            try:
+                waiter = self._send(request_id, payload)
+            except (OSError, RuntimeError) as e:
+                if attempt:
+                    raise RpcError(f"worker unavailable: {e}")
+                continue
+
+            try:
+                result, error = waiter.get(timeout=timeout)
+            except queue.Empty:
+                with self._lock:
+                    self._pending.pop(request_id, None)
+                raise RpcError("request timed out")
+
+            if error is _DISCONNECTED and not attempt:
+                continue
+            if error:
+                raise RpcError(error)
+            return result
+
+    def close(self):
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+        if self.process is not None:
+            self.process.terminate()
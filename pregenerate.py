@@ -0,0 +1,159 @@
+import json
+import os
+import sys
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import google.generativeai as genai
+from dotenv import load_dotenv
+from answer_cache import ANSWER_CACHE_FILE, QUESTION_LOG_FILE
+from single_flight import normalize_question
+from transcript_store import TranscriptStore, open_store, lecture_windows
+
+load_dotenv()
+genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+
+QUESTIONS_PER_LECTURE = 15
+LECTURE_CHARS = 12000     # Transcript text shown to Gemini per lecture
+TOP_LOGGED = 100          # Most frequent logged questions to include
+MAX_WORKERS = 4           # Concurrent answer generations (Gemini quota bound)
+QUESTION_CACHE_DIR = "models/question_cache"
+
+def _parse_json_list(text):
+    text = text.strip()
+    # Extract JSON if wrapped in markdown
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0].strip()
+    elif "```" in text:
+        text = text.split("```")[1].split("```")[0].strip()
+    return [q for q in json.loads(text) if isinstance(q, str) and q.strip()]
+
+def _question_cache_path(entry):
+    return os.path.join(QUESTION_CACHE_DIR, f"{TranscriptStore.entry_key(entry)}.json")
+
+def questions_from_lectures(store, per_lecture=QUESTIONS_PER_LECTURE):
+    """Ask Gemini what students would most likely ask about each lecture (cached per lecture)"""
+    model = genai.GenerativeModel('models/gemini-2.5-flash')
+    os.makedirs(QUESTION_CACHE_DIR, exist_ok=True)
+
+    cached, pending = [], []
+    for entry in store.entries():
+        path = _question_cache_path(entry)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                cached.append(json.load(f))
+        else:
+            pending.append(entry)
+    print(f"📚 Questions cached for {len(cached)} lectures, {len(pending)} to generate")
+
+    def ask(file):
+        # Spread the excerpt over the whole lecture instead of only its opening
+        windows = lecture_windows(store, file)
+        step = max(1, len(windows) * 600 // LECTURE_CHARS)
+        excerpt = "\n".join(windows[::step])[:LECTURE_CHARS]
+        prompt = f"""
+Here is a transcript excerpt from a Gate Smashers lecture ("{file}"):
+
+{excerpt}
+
+List the {per_lecture} questions students are most likely to ask about this lecture,
+phrased the way students actually type them (Hinglish is fine, short, no numbering).
+
+Return ONLY a JSON array of strings.
+"""
+        try:
+            return _parse_json_list(model.generate_content(prompt).text)
+        except Exception as e:
+            print(f"✗ Question generation failed for {file}: {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        results = list(pool.map(ask, [entry["file"] for entry in pending]))
+
+    for entry, questions in zip(pending, results):
+        # Failed lectures return [] and are not cached, so the next run retries them
+        if questions:
+            with open(_question_cache_path(entry), 'w', encoding='utf-8') as f:
+                json.dump(questions, f, ensure_ascii=False, indent=2)
+    return [q for questions in cached + results for q in questions]
+
+def questions_from_log(path=QUESTION_LOG_FILE, top=TOP_LOGGED):
+    """Most frequent live questions (after normalization)"""
+    if not os.path.exists(path):
+        return []
+    counts, first_seen = Counter(), {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                question = json.loads(line)["question"]
+            except (ValueError, KeyError):
+                continue
+            key = normalize_question(question)
+            counts[key] += 1
+            first_seen.setdefault(key, question)
+    return [first_seen[key] for key, _ in counts.most_common(top)]
+
+def pregenerate_answers(with_audio=False, cache_path=ANSWER_CACHE_FILE):
+    """Generate answers (and optional audio) for anticipated questions into the answer cache"""
+    from chatbot import TeacherClone
+
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+
+    questions = questions_from_log() + questions_from_lectures(open_store())
+    todo = {}
+    for question in questions:
+        key = normalize_question(question)
+        if key and key not in cache and key not in todo:
+            todo[key] = question
+    print(f"📝 {len(questions)} candidate questions, {len(todo)} new")
+
+    clone = TeacherClone()
+    voice_cloner = None
+    if with_audio:
+        # Same backend the app serves, so cached answers sound like live ones
+        from voice_service import open_voice_cloner
+        voice_cloner = open_voice_cloner()
+        os.makedirs("static", exist_ok=True)
+
+    def answer(item):
+        key, question = item
+        response, sources = clone.get_response_with_sources(question)
+        audio_file = None
+        if voice_cloner:
+            extension = getattr(voice_cloner, "file_extension", "mp3")
+            audio_file = f"pregen_{uuid.uuid4().hex[:8]}.{extension}"
+            if not voice_cloner.generate_voice(response, output_path=f"static/{audio_file}"):
+                audio_file = None
+        return key, {"question": question, "response": response, "sources": sources, "audio_file": audio_file}
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = [pool.submit(answer, item) for item in todo.items()]
+        for future in futures:
+            try:
+                key, entry = future.result()
+            except Exception as e:
+                print(f"✗ Answer failed: {e}")
+                continue
+            cache[key] = entry
+            done += 1
+            # Checkpoint periodically so an interrupted run keeps its progress
+            if done % 20 == 0:
+                _save(cache, cache_path)
+
+    _save(cache, cache_path)
+    print(f"✅ {done} answers pre-generated ({len(cache)} in cache)")
+    return cache
+
+def _save(cache, cache_path):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp = cache_path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, cache_path)
+
+if __name__ == "__main__":
+    pregenerate_answers(with_audio="--audio" in sys.argv)
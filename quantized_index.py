@@ -0,0 +1,229 @@
+import json
+import mmap
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+from langchain.docstore.document import Document
+
+INDEX_DIR = "./quantized_index"
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / (np.linalg.norm(vectors, axis=-1, keepdims=True) + 1e-8)
+
+
+def _kmeans(vectors, nlist, iterations=20, seed=0):
+    """Spherical k-means for the IVF coarse quantizer"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = vectors[assign == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+            else:
+                centroids[c] = vectors[rng.integers(len(vectors))]
+        centroids = _normalize(centroids)
+    return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+
+def _current_dir(path):
+    """Directory of the live index version (path/CURRENT names it)"""
+    try:
+        with open(os.path.join(path, "CURRENT"), "r", encoding="utf-8") as f:
+            return os.path.join(path, f.read().strip())
+    except FileNotFoundError:
+        return path  # Flat layout from before versioned builds
+
+def build_index(ids, vectors, texts, metadatas, path=INDEX_DIR, nlist=None):
+    """Write an IVF index with int8 codes, float32 vectors for re-scoring, and docs.
+
+    Vectors are reordered so every inverted list is one contiguous row range.
+    Each build goes into a fresh version directory and CURRENT is switched
+    atomically, so processes that have the old version mapped keep working.
+    """
+    if len(vectors) == 0:
+        raise ValueError("No vectors to index")
+    root = path
+    version = f"v{time.time_ns()}"
+    path = os.path.join(root, version)
+    os.makedirs(path, exist_ok=True)
+    vectors = _normalize(vectors)
+    n, dim = vectors.shape
+    nlist = nlist or max(1, min(n, int(4 * np.sqrt(n))))
+
+    centroids, assign = _kmeans(vectors, nlist)
+    order = np.argsort(assign, kind="stable")
+    list_offsets = np.searchsorted(assign[order], np.arange(nlist + 1)).astype(np.int64)
+    vectors = vectors[order]
+
+    # Symmetric per-vector int8 quantization
+    scales = np.abs(vectors).max(axis=1) / 127.0 + 1e-12
+    codes = np.round(vectors / scales[:, None]).astype(np.int8)
+
+    codes.tofile(os.path.join(path, "codes.i8"))
+    vectors.tofile(os.path.join(path, "vectors.f32"))
+    np.save(os.path.join(path, "scales.npy"), scales.astype(np.float32))
+    np.save(os.path.join(path, "centroids.npy"), centroids.astype(np.float32))
+    np.save(os.path.join(path, "list_offsets.npy"), list_offsets)
+
+    # Documents as JSON lines, located by byte offset so only hits are decoded
+    doc_offsets = np.zeros(n + 1, dtype=np.int64)
+    with open(os.path.join(path, "docs.jsonl"), "wb") as f:
+        for row, i in enumerate(order):
+            line = json.dumps({"id": ids[i], "text": texts[i], "metadata": metadatas[i] or {}},
+                              ensure_ascii=False).encode("utf-8") + b"\n"
+            f.write(line)
+            doc_offsets[row + 1] = doc_offsets[row] + len(line)
+    np.save(os.path.join(path, "doc_offsets.npy"), doc_offsets)
+
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"count": int(n), "dim": int(dim), "nlist": int(nlist)}, f)
+
+    previous = _current_dir(root)
+    tmp = os.path.join(root, "CURRENT.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(root, "CURRENT"))
+
+    # Keep the previous version for readers still switching over; drop older ones
+    for name in os.listdir(root):
+        full = os.path.join(root, name)
+        if name.startswith("v") and os.path.isdir(full) and full not in (path, previous):
+            shutil.rmtree(full, ignore_errors=True)
+
+    print(f"✅ Quantized index: {n} vectors, {nlist} lists, {codes.nbytes / 1e6:.1f} MB of int8 codes")
+
+
+def build_from_chroma(persist_directory="./chroma_db", path=INDEX_DIR):
+    """Build the quantized index from the existing Chroma store without re-embedding"""
+    from langchain_community.vectorstores import Chroma
+
+    vectordb = Chroma(persist_directory=persist_directory)
+    data = vectordb._collection.get(include=["embeddings", "documents", "metadatas"])
+    if not data["ids"]:
+        print("⚠️ Chroma store is empty, quantized index not built")
+        return
+    build_index(data["ids"], data["embeddings"], data["documents"], data["metadatas"], path)
+
+
+class QuantizedIndex:
+    def __init__(self, embedding_function, path=INDEX_DIR, nprobe=8, rescore_factor=10):
+        """Memory-mapped IVF + int8 index with the same similarity_search() as Chroma"""
+        self.embedding_function = embedding_function
+        self.nprobe = nprobe
+        self.rescore_factor = rescore_factor
+        path = _current_dir(path)
+
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        n, dim = meta["count"], meta["dim"]
+
+        # Only the centroids and offsets are read eagerly; everything else is paged in on demand
+        self.centroids = np.load(os.path.join(path, "centroids.npy"))
+        self.list_offsets = np.load(os.path.join(path, "list_offsets.npy"))
+        self.scales = np.load(os.path.join(path, "scales.npy"), mmap_mode="r")
+        self.doc_offsets = np.load(os.path.join(path, "doc_offsets.npy"), mmap_mode="r")
+        self.codes = np.memmap(os.path.join(path, "codes.i8"), dtype=np.int8, mode="r", shape=(n, dim))
+        self.vectors = np.memmap(os.path.join(path, "vectors.f32"), dtype=np.float32, mode="r", shape=(n, dim))
+        with open(os.path.join(path, "docs.jsonl"), "rb") as f:
+            self.docs = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _doc(self, row):
+        start, end = int(self.doc_offsets[row]), int(self.doc_offsets[row + 1])
+        return json.loads(self.docs[start:end])
+
+    def search_vector(self, query, k=3):
+        """Return [(row, score)] for a normalized query vector"""
+        probes = np.argsort(self.centroids @ query)[::-1][:self.nprobe]
+        rows = np.concatenate([np.arange(self.list_offsets[c], self.list_offsets[c + 1]) for c in probes])
+        if len(rows) == 0:
+            return []
+
+        # Approximate scores from int8 codes, then exact float32 scores for the shortlist
+        approx = (self.codes[rows].astype(np.float32) @ query) * self.scales[rows]
+        shortlist = min(len(rows), k * self.rescore_factor)
+        candidates = np.sort(rows[np.argpartition(-approx, shortlist - 1)[:shortlist]])
+        exact = self.vectors[candidates] @ query
+        top = np.argsort(-exact)[:k]
+        return [(int(candidates[i]), float(exact[i])) for i in top]
+
+    def similarity_search_by_vector_with_score(self, embedding, k=3):
+        results = []
+        for row, score in self.search_vector(_normalize(embedding), k):
+            doc = self._doc(row)
+            results.append((Document(page_content=doc["text"], metadata=doc["metadata"]), score))
+        return results
+
+    def similarity_search_with_score(self, query, k=3):
+        return self.similarity_search_by_vector_with_score(self.embedding_function.embed_query(query), k)
+
+    def similarity_search_by_vector(self, embedding, k=3):
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search(self, query, k=3):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def ids(self, rows):
+        return [self._doc(row)["id"] for row in rows]
+
+
+def benchmark(persist_directory="./chroma_db", path=INDEX_DIR, k=3, num_queries=200):
+    """Compare recall@k and latency of the quantized index against Chroma"""
+    from langchain_community.vectorstores import Chroma
+    from knowledge_base import get_embeddings
+
+    embeddings = get_embeddings()
+    start = time.perf_counter()
+    vectordb = Chroma(persist_directory=persist_directory, embedding_function=embeddings)
+    chroma_open = time.perf_counter() - start
+    data = vectordb._collection.get(include=["documents"])
+    if not data["documents"]:
+        print("⚠️ Chroma store is empty, nothing to benchmark")
+        return
+
+    start = time.perf_counter()
+    index = QuantizedIndex(embeddings, path)
+    index_open = time.perf_counter() - start
+
+    # Stored chunks double as realistic queries
+    rng = np.random.default_rng(0)
+    picks = rng.choice(len(data["documents"]), min(num_queries, len(data["documents"])), replace=False)
+    queries = [data["documents"][i][:200] for i in picks]
+    query_vectors = embeddings.embed_documents(queries)
+
+    chroma_time, index_time, hits = 0.0, 0.0, 0
+    for vector in query_vectors:
+        start = time.perf_counter()
+        expected = vectordb._collection.query(query_embeddings=[vector], n_results=k)["ids"][0]
+        chroma_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = index.ids([row for row, _ in index.search_vector(_normalize(vector), k)])
+        index_time += time.perf_counter() - start
+
+        hits += len(set(expected) & set(found))
+
+    n = len(query_vectors)
+    print(f"\n📊 Benchmark over {n} queries (k={k}, nprobe={index.nprobe})")
+    print(f"   Open time:  Chroma {chroma_open * 1000:.1f} ms | Quantized {index_open * 1000:.1f} ms")
+    print(f"   Latency:    Chroma {chroma_time / n * 1000:.2f} ms | Quantized {index_time / n * 1000:.2f} ms")
+    print(f"   Recall@{k}:  {hits / (n * k):.3f} (vs Chroma results)")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "build"
+    if command == "build":
+        build_from_chroma()
+    elif command == "bench":
+        benchmark()
+    else:
+        print("Usage: python quantized_index.py [build|bench]")
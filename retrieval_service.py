@@ -0,0 +1,80 @@
+import os
+import queue
+import sys
+import threading
+from langchain.docstore.document import Document
+from local_rpc import RpcClient, serve_forever
+
+SERVICE_ADDRESS = ("127.0.0.1", int(os.getenv("RETRIEVAL_SERVICE_PORT", "6002")))
+MAX_BATCH = 32          # Queries embedded in one model call
+BATCH_WAIT = 0.005      # Seconds to wait for more queries once one has arrived
+
+
+class _Batcher:
+    def __init__(self, embeddings, vectordb):
+        """Collect queries from every connection and embed them together"""
+        self.embeddings = embeddings
+        self.vectordb = vectordb
+        self.requests = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            batch = [self.requests.get()]
+            try:
+                while len(batch) < MAX_BATCH:
+                    batch.append(self.requests.get(timeout=BATCH_WAIT))
+            except queue.Empty:
+                pass
+            self._process(batch)
+
+    def submit(self, reply, request_id, payload):
+        query, k = payload
+        self.requests.put((reply, request_id, query, k))
+
+    def _process(self, batch):
+        try:
+            vectors = self.embeddings.embed_documents([query for _, _, query, _ in batch])
+        except Exception as e:
+            for reply, request_id, _, _ in batch:
+                reply(request_id, None, str(e))
+            return
+
+        for (reply, request_id, _, k), vector in zip(batch, vectors):
+            try:
+                docs = self.vectordb.similarity_search_by_vector(vector, k=k)
+                reply(request_id, [(d.page_content, d.metadata) for d in docs], None)
+            except Exception as e:
+                reply(request_id, None, str(e))
+
+
+def serve(address=SERVICE_ADDRESS):
+    """Own the embedding model and vector index for every web worker on this box"""
+    from knowledge_base import get_embeddings, open_vector_store
+
+    embeddings = get_embeddings()
+    batcher = _Batcher(embeddings, open_vector_store(embeddings))
+
+    serve_forever(address, batcher.submit, "Retrieval service")
+
+
+class RemoteRetriever:
+    def __init__(self, address=SERVICE_ADDRESS, spawn=True):
+        """Drop-in for the vector store's similarity_search(), backed by the shared service.
+
+        Like VoiceCloneService, the first worker to find no service running starts it.
+        """
+        self._client = RpcClient(address, __file__ if spawn else None)
+
+    def similarity_search(self, query, k=3):
+        results = self._client.call((query, k), timeout=30)
+        return [Document(page_content=text, metadata=metadata) for text, metadata in results]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        serve()
+    else:
+        retriever = RemoteRetriever()
+        for doc in retriever.similarity_search("DBMS mein normalization kya hota hai?"):
+            print(doc.metadata, doc.page_content[:100])
@@ -0,0 +1,60 @@
+import threading
+import unicodedata
+import re
+
+
+def normalize_question(text):
+    """Normalize a question so trivially different copies share one key"""
+    text = unicodedata.normalize("NFKC", text or "")
+    text = re.sub(r"\s+", " ", text).strip().lower()
+    return text.rstrip("?!. ")
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        """Collapse concurrent calls with the same key into one upstream call"""
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn once per in-flight key; every waiter gets the same result.
+
+        Returns (result, shared) where shared is True for callers that
+        piggybacked on another request's computation.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            # Record every failure (KeyboardInterrupt, SystemExit too) so waiters re-raise
+            # it instead of returning a None result
+            call.error = e
+            raise
+        finally:
+            # Forget the key before waking waiters so the next burst recomputes
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
@@ -1,19 +1,46 @@
 import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import google.generativeai as genai
 from dotenv import load_dotenv
 import os
+from transcript_store import TranscriptStore, open_store, lecture_windows
 
 load_dotenv()
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
+STYLE_MODEL = 'models/gemini-2.5-flash'
+CACHE_DIR = "models/style_cache"
+WINDOW_CHARS = 600          # Consecutive segments are grouped into windows of ~this size
+SAMPLES_PER_LECTURE = 8     # Windows sent to Gemini per lecture in the map step
+MAX_WORKERS = 4             # Concurrent Gemini calls in the map step
+REDUCE_FAN_IN = 20          # Partial profiles merged per reduce call
+
+STYLE_ASPECTS = """1. **Communication Style**: Formal/informal, pace, tone
+2. **Explanation Pattern**: How they break down concepts (analogies, examples, step-by-step)
+3. **Language Mix**: Hindi/English usage patterns
+4. **Signature Phrases**: Common expressions, catchphrases
+5. **Teaching Techniques**: Questioning style, recap patterns, emphasis methods
+6. **Personality Traits**: Enthusiasm level, humor, encouragement style"""
+
 def analyze_teaching_style():
     """Extract teaching patterns from transcripts"""
     
-    with open("transcripts/combined.json", 'r', encoding='utf-8') as f:
-        transcripts = json.load(f)
-    
-    # Combine all text
-    full_text = "\n\n".join([t["text"] for t in transcripts])
+    # Only the first 8000 chars are used, so stop reading once we have them
+    store = open_store()
+    parts = []
+    length = 0
+    for file in store.files():
+        for segment in store.iter_segments(file):
+            parts.append(segment["text"])
+            length += len(segment["text"])
+            if length >= 8000:
+                break
+        if length >= 8000:
+            break
+        parts.append("\n\n")
+    full_text = "".join(parts)
     
     analysis_prompt = f"""
 Analyze this teacher's (Gate Smashers) teaching style based on these lecture transcripts:
@@ -21,20 +48,12 @@ Analyze this teacher's (Gate Smashers) teaching style based on these lecture tra
 {full_text[:8000]}  # First 8000 chars for analysis
 
 Extract and describe:
-1. **Communication Style**: Formal/informal, pace, tone
-2. **Explanation Pattern**: How they break down concepts (analogies, examples, step-by-step)
-3. **Language Mix**: Hindi/English usage patterns
-4. **Signature Phrases**: Common expressions, catchphrases
-5. **Teaching Techniques**: Questioning style, recap patterns, emphasis methods
-6. **Personality Traits**: Enthusiasm level, humor, encouragement style
+{STYLE_ASPECTS}
 
 Provide a detailed profile that can be used to mimic this teaching style.
 """
     
-    model = genai.GenerativeModel('models/gemini-2.5-flash')
-    for m in genai.list_models():
-        print(m.name)
-
+    model = genai.GenerativeModel(STYLE_MODEL)
     response = model.generate_content(analysis_prompt)
     
     style_profile = {
@@ -50,8 +69,146 @@ Provide a detailed profile that can be used to mimic this teaching style.
 
     return style_profile
 
+def diverse_sample(vectors, k):
+    """Pick k indices: the most central window, then greedy farthest-point.
+
+    This keeps one typical passage per lecture and spreads the rest across
+    the lecture's topics instead of taking whatever comes first.
+    """
+    n = len(vectors)
+    if n <= k:
+        return list(range(n))
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-8
+    centroid = vectors.mean(axis=0)
+    chosen = [int(np.argmax(vectors @ centroid))]
+    # Cosine distance to the nearest already-chosen window
+    min_dist = 1 - vectors @ vectors[chosen[0]]
+    while len(chosen) < k:
+        idx = int(np.argmax(min_dist))
+        chosen.append(idx)
+        min_dist = np.minimum(min_dist, 1 - vectors @ vectors[idx])
+    return sorted(chosen)
+
+def _cache_path(entry):
+    return os.path.join(CACHE_DIR, f"{TranscriptStore.entry_key(entry)}.json")
+
+def _analyze_lecture(model, file, samples):
+    """Map step: partial style profile for one lecture's sampled passages"""
+    passages = "\n\n---\n\n".join(samples)
+    prompt = f"""
+Analyze this teacher's (Gate Smashers) teaching style in these representative passages
+sampled from the lecture "{file}":
+
+{passages}
+
+Briefly describe, with concrete quotes where possible:
+{STYLE_ASPECTS}
+"""
+    return model.generate_content(prompt).text
+
+def _merge_profiles(model, partials):
+    """Reduce step: merge per-lecture notes into one profile"""
+    notes = "\n\n".join(f"### Lecture: {p['file']}\n{p['analysis']}" for p in partials)
+    prompt = f"""
+Below are style notes on the same teacher (Gate Smashers), each written from a different lecture.
+Merge them into ONE consolidated teaching style profile. Keep traits that recur across lectures,
+drop one-off observations, and collect the most frequent signature phrases.
+
+{notes}
+
+Structure the profile as:
+{STYLE_ASPECTS}
+
+Provide a detailed profile that can be used to mimic this teaching style.
+"""
+    return model.generate_content(prompt).text
+
+def analyze_teaching_style_mapreduce():
+    """Map-reduce style analysis over every lecture (cached per lecture)"""
+    from knowledge_base import get_embeddings
+
+    store = open_store()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+
+    partials, pending = [], []
+    for entry in store.entries():
+        path = _cache_path(entry)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                partials.append(json.load(f))
+        else:
+            pending.append(entry)
+
+    print(f"📚 {len(partials)} lectures cached, {len(pending)} to analyze")
+
+    if pending:
+        # Embedding is CPU-bound, so sample sequentially before fanning out to Gemini
+        embeddings = get_embeddings()
+        jobs = []
+        for entry in pending:
+            windows = lecture_windows(store, entry["file"], WINDOW_CHARS)
+            if not windows:
+                continue
+            picked = diverse_sample(embeddings.embed_documents(windows), SAMPLES_PER_LECTURE)
+            jobs.append((entry, [windows[i] for i in picked]))
+
+        model = genai.GenerativeModel(STYLE_MODEL)
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            futures = [(entry, samples, pool.submit(_analyze_lecture, model, entry["file"], samples))
+                       for entry, samples in jobs]
+            for entry, samples, future in futures:
+                try:
+                    analysis = future.result()
+                except Exception as e:
+                    print(f"✗ {entry['file']}: {e}")
+                    continue
+                partial = {"file": entry["file"], "analysis": analysis, "samples": samples}
+                with open(_cache_path(entry), 'w', encoding='utf-8') as f:
+                    json.dump(partial, f, ensure_ascii=False, indent=2)
+                partials.append(partial)
+                print(f"✓ Analyzed {entry['file']}")
+
+    if not partials:
+        print("⚠️ No lectures to analyze")
+        return None
+
+    model = genai.GenerativeModel(STYLE_MODEL)
+    # Tree reduce so the merge prompt stays bounded however many lectures there are
+    level = partials
+    while len(level) > 1:
+        groups = [level[i:i + REDUCE_FAN_IN] for i in range(0, len(level), REDUCE_FAN_IN)]
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            merged = list(pool.map(lambda g: g[0]["analysis"] if len(g) == 1 else _merge_profiles(model, g), groups))
+        level = [{"file": f"group {i + 1}", "analysis": a} for i, a in enumerate(merged)]
+    analysis = level[0]["analysis"]
+
+    # One representative passage per lecture, round-robin, for the few-shot examples
+    sample_text = ""
+    for round_idx in range(SAMPLES_PER_LECTURE):
+        for p in partials:
+            if round_idx < len(p["samples"]) and len(sample_text) < 3000:
+                sample_text += p["samples"][round_idx] + "\n\n"
+
+    style_profile = {
+        "analysis": analysis,
+        "sample_transcripts": sample_text[:3000],
+        "lectures": [p["file"] for p in partials]
+    }
+
+    with open("models/teaching_style.json", 'w', encoding='utf-8') as f:
+        json.dump(style_profile, f, ensure_ascii=False, indent=2)
+
+    print(f"✓ Teaching style merged from {len(partials)} lectures and saved!")
+    return style_profile
+
 if __name__ == "__main__":
-    analyze_teaching_style()
+    # --quick keeps the old single-prompt analysis of the first 8000 chars
+    if "--quick" in sys.argv:
+        analyze_teaching_style()
+    else:
+        analyze_teaching_style_mapreduce()
   
 
 
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import mmap
+import os
+import sys
+import threading
+
+import numpy as np
+from file_lock import FileLock
+
+STORE_DIR = "transcripts/store"
+COMBINED_JSON = "transcripts/combined.json"
+
+# One fixed-size row per Whisper segment; text lives in text.bin
+SEGMENT_DTYPE = np.dtype([
+    ("text_offset", "<u8"),
+    ("text_len", "<u4"),
+    ("start", "<f4"),
+    ("end", "<f4"),
+    ("file_id", "<u4"),
+])
+
+
+class TranscriptStore:
+    def __init__(self, path=STORE_DIR):
+        """Compact columnar transcript store.
+
+        segments.bin  fixed-width rows (text offset/length, start, end, file id)
+        text.bin      concatenated UTF-8 segment text
+        index.json    lecture list with each lecture's segment range
+
+        Readers memory-map both binary files, so opening the store costs the
+        size of index.json regardless of how many lectures are archived.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._index = self._load_index()
+
+    @property
+    def _segments_path(self):
+        return os.path.join(self.path, "segments.bin")
+
+    @property
+    def _text_path(self):
+        return os.path.join(self.path, "text.bin")
+
+    @property
+    def _lock_path(self):
+        return os.path.join(self.path, "store.lock")
+
+    @property
+    def _index_path(self):
+        return os.path.join(self.path, "index.json")
+
+    def _load_index(self):
+        if not os.path.exists(self._index_path):
+            return {"version": 1, "segment_count": 0, "text_bytes": 0, "next_file_id": 0, "files": []}
+        with open(self._index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_index(self):
+        tmp = self._index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, ensure_ascii=False)
+        os.replace(tmp, self._index_path)
+
+    def __len__(self):
+        return len(self._index["files"])
+
+    def files(self):
+        """Lecture names in insertion order"""
+        return [entry["file"] for entry in self._index["files"]]
+
+    def entries(self):
+        """Index entries (file, file_id, segment range); file_id changes when a lecture is replaced"""
+        return [dict(entry) for entry in self._index["files"]]
+
+    @staticmethod
+    def entry_key(entry):
+        """Stable key for one version of a lecture, for caches derived from its transcript.
+
+        file_id changes when a lecture is replaced, so replaced lectures get a new key.
+        """
+        return hashlib.sha1(f"{entry['file']}:{entry['file_id']}:{entry['segment_count']}".encode("utf-8")).hexdigest()[:16]
+
+    # ---- writing ----
+
+    def append_transcript(self, transcript_data):
+        """Add one lecture ({"file", "segments"}); replaces an existing lecture of the same name"""
+        segments = transcript_data.get("segments", [])
+        file = transcript_data.get("file", "unknown")
+
+        # Other instances (other processes too) may have appended since we opened the store,
+        # so re-read the committed index under a file lock before touching the binaries
+        with self._lock, FileLock(self._lock_path):
+            self._index = index = self._load_index()
+            # Drop bytes past the last committed index (left by an interrupted append)
+            for path, size in ((self._segments_path, index["segment_count"] * SEGMENT_DTYPE.itemsize),
+                               (self._text_path, index["text_bytes"])):
+                with open(path, "ab") as f:
+                    f.truncate(size)
+
+            rows = np.zeros(len(segments), dtype=SEGMENT_DTYPE)
+            file_id = index["next_file_id"]
+            offset = index["text_bytes"]
+            with open(self._text_path, "ab") as text_file:
+                for i, segment in enumerate(segments):
+                    encoded = segment.get("text", "").encode("utf-8")
+                    text_file.write(encoded)
+                    rows[i] = (offset, len(encoded), segment.get("start", 0), segment.get("end", 0), file_id)
+                    offset += len(encoded)
+
+            with open(self._segments_path, "ab") as f:
+                f.write(rows.tobytes())
+
+            # Replaced lectures just fall out of the index; their rows become dead space
+            index["files"] = [e for e in index["files"] if e["file"] != file]
+            index["files"].append({
+                "file_id": file_id,
+                "file": file,
+                "first_segment": index["segment_count"],
+                "segment_count": len(segments),
+            })
+            index["segment_count"] += len(segments)
+            index["text_bytes"] = offset
+            index["next_file_id"] = file_id + 1
+            self._write_index()
+
+    # ---- reading ----
+
+    def _open_maps(self):
+        count = self._index["segment_count"]
+        if count == 0:
+            return np.zeros(0, dtype=SEGMENT_DTYPE), b""
+        rows = np.memmap(self._segments_path, dtype=SEGMENT_DTYPE, mode="r", shape=(count,))
+        if self._index["text_bytes"] == 0:
+            return rows, b""
+        with open(self._text_path, "rb") as f:
+            text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return rows, text
+
+    def iter_segments(self, file=None):
+        """Yield {"file", "text", "start", "end"} for every segment (optionally one lecture)"""
+        rows, text = self._open_maps()
+        for entry in self._index["files"]:
+            if file is not None and entry["file"] != file:
+                continue
+            first = entry["first_segment"]
+            for row in rows[first:first + entry["segment_count"]]:
+                offset = int(row["text_offset"])
+                yield {
+                    "file": entry["file"],
+                    "text": text[offset:offset + int(row["text_len"])].decode("utf-8"),
+                    "start": float(row["start"]),
+                    "end": float(row["end"]),
+                }
+
+    def iter_transcripts(self):
+        """Yield one lecture at a time in the old combined.json shape"""
+        for file in self.files():
+            segments = list(self.iter_segments(file))
+            yield {
+                "file": file,
+                "text": "".join(s["text"] for s in segments),
+                "segments": segments,
+            }
+
+
+def lecture_windows(store, file, window_chars=600):
+    """Group a lecture's segments into ~window_chars passages"""
+    windows, current = [], []
+    length = 0
+    for segment in store.iter_segments(file):
+        current.append(segment["text"])
+        length += len(segment["text"])
+        if length >= window_chars:
+            windows.append("".join(current).strip())
+            current, length = [], 0
+    if current:
+        windows.append("".join(current).strip())
+    return [w for w in windows if w]
+
+
+def migrate_from_json(combined_path=COMBINED_JSON, store_path=STORE_DIR):
+    """One-off import of the legacy combined.json into the compact store"""
+    with open(combined_path, "r", encoding="utf-8") as f:
+        transcripts = json.load(f)
+
+    store = TranscriptStore(store_path)
+    for transcript in transcripts:
+        store.append_transcript(transcript)
+    print(f"✓ Migrated {len(transcripts)} lectures from {combined_path} to {store_path}")
+    return store
+
+
+def open_store(store_path=STORE_DIR, combined_path=COMBINED_JSON):
+    """Open the store, migrating combined.json on first use"""
+    store = TranscriptStore(store_path)
+    if len(store) == 0 and os.path.exists(combined_path):
+        store = migrate_from_json(combined_path, store_path)
+    return store
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "migrate":
+        migrate_from_json(*sys.argv[2:4])
+    else:
+        store = open_store()
+        print(f"📚 {len(store)} lectures in {store.path}")
+        for name in store.files():
+            print(f"  - {name}")
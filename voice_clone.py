@@ -5,13 +5,31 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 from TTS.tts.configs.xtts_config import XttsConfig
 from TTS.tts.models.xtts import XttsAudioConfig, XttsArgs
 from TTS.config.shared_configs import BaseDatasetConfig
+import torchaudio
+import hashlib
 import os
 
+LATENT_CACHE_DIR = "models/voice_cache"
+DEFAULT_REFERENCE_AUDIO = r"D:\teacher-clone-ai\videos\Biggest CyberAttack in the History ｜ Why Cybersecurity🕵️‍♀️🕵️‍♂️ is Very Important🔝？.wav"
+
+def configure_cpu_threads(num_threads=None):
+    """Pin torch's intra-op pool for CPU inference (XTTS_THREADS or all cores)"""
+    num_threads = num_threads or int(os.getenv("XTTS_THREADS", os.cpu_count() or 1))
+    torch.set_num_threads(num_threads)
+    try:
+        # Inter-op parallelism only adds contention for a single autoregressive model
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Already set once in this process
+    return num_threads
+
 class VoiceCloner:
-    def __init__(self):
+    def __init__(self, reference_audio=None, num_threads=None):
         # Setup device and allowlist XTTS configs
         
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        if self.device == "cpu":
+            configure_cpu_threads(num_threads)
         torch.serialization.add_safe_globals([
             XttsConfig,
             XttsAudioConfig,
@@ -19,30 +37,62 @@ class VoiceCloner:
             XttsArgs
         ])
 
-        # Load XTTS model for voice cloning
+        # Load XTTS model once; the fallback voice reuses the same weights
         self.xtts = TTS("tts_models/multilingual/multi-dataset/xtts_v2").to(self.device)
-
-        # Load Coqui Hindi TTS model for fallback
-        self.fallback = TTS("tts_models/multilingual/multi-dataset/xtts_v2").to(self.device)
-        
-
+        self.fallback = self.xtts
 
         # Reference audio for cloning
-        self.reference_audio = r"D:\teacher-clone-ai\videos\Biggest CyberAttack in the History ｜ Why Cybersecurity🕵️‍♀️🕵️‍♂️ is Very Important🔝？.wav"
+        self.reference_audio = reference_audio or os.getenv("XTTS_REFERENCE_WAV", DEFAULT_REFERENCE_AUDIO)
+        self._latents = {}
+
+    def _latent_cache_path(self, speaker_wav):
+        # Key on content identity (path, size, mtime) so edited reference clips are recomputed
+        stat = os.stat(speaker_wav)
+        key = f"{os.path.abspath(speaker_wav)}:{stat.st_size}:{stat.st_mtime_ns}"
+        return os.path.join(LATENT_CACHE_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".pt")
+
+    def get_speaker_latents(self, speaker_wav=None):
+        """Conditioning latents for a reference voice, cached in memory and on disk"""
+        speaker_wav = speaker_wav or self.reference_audio
+        cache_path = self._latent_cache_path(speaker_wav)
+        if cache_path in self._latents:
+            return self._latents[cache_path]
+
+        if os.path.exists(cache_path):
+            cached = torch.load(cache_path, map_location=self.device)
+            latents = (cached["gpt_cond_latent"], cached["speaker_embedding"])
+        else:
+            model = self.xtts.synthesizer.tts_model
+            gpt_cond_latent, speaker_embedding = model.get_conditioning_latents(audio_path=[speaker_wav])
+            os.makedirs(LATENT_CACHE_DIR, exist_ok=True)
+            torch.save({"gpt_cond_latent": gpt_cond_latent.cpu(), "speaker_embedding": speaker_embedding.cpu()}, cache_path)
+            latents = (gpt_cond_latent, speaker_embedding)
+
+        self._latents[cache_path] = latents
+        return latents
+
+    def synthesize(self, text, output_path="static/cloned.wav", speaker_wav=None, language="hi"):
+        """Run XTTS inference from cached latents and write a WAV file"""
+        gpt_cond_latent, speaker_embedding = self.get_speaker_latents(speaker_wav)
+        model = self.xtts.synthesizer.tts_model
+        with torch.inference_mode():
+            out = model.inference(
+                text,
+                language,
+                gpt_cond_latent.to(self.device),
+                speaker_embedding.to(self.device),
+                temperature=0.7,
+                repetition_penalty=2.0
+            )
+        wav = torch.as_tensor(out["wav"]).unsqueeze(0).cpu()
+        torchaudio.save(output_path, wav, model.config.audio.output_sample_rate)
+        return output_path
 
     def clone_voice(self, text, output_path="static/cloned.wav"):
         console = Console()
         with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), transient=True) as progress:
             progress.add_task(description="Cloning voice...", total=None)
-
-            self.xtts.tts_to_file(
-                text=text,
-                file_path=output_path,
-                speaker_wav=self.reference_audio,
-                temperature=0.7,
-                repetition_penalty=2.0,
-                language="hi"
-            )
+            self.synthesize(text, output_path=output_path)
         return output_path
 
     def fallback_voice(self, text, output_path="static/fluent.wav"):
@@ -0,0 +1,87 @@
+import os
+import queue
+import sys
+import threading
+import time
+from local_rpc import RpcClient, RpcError, serve_forever
+
+SERVICE_ADDRESS = ("127.0.0.1", int(os.getenv("XTTS_SERVICE_PORT", "6001")))
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+
+def _allowed_output(path):
+    """Only ever write synthesized audio inside static/"""
+    path = os.path.realpath(path)
+    return os.path.commonpath([path, os.path.realpath(OUTPUT_DIR)]) == os.path.realpath(OUTPUT_DIR)
+
+
+def serve(address=SERVICE_ADDRESS, reference_audio=None, num_threads=None):
+    """Worker process: load XTTS once, then synthesize requests in arrival order"""
+    from voice_clone import VoiceCloner
+
+    cloner = VoiceCloner(reference_audio=reference_audio, num_threads=num_threads)
+    # Warm the latent cache before accepting work
+    cloner.get_speaker_latents()
+
+    # Every connection feeds one queue; a single thread owns the model
+    jobs = queue.Queue()
+
+    def synthesize_forever():
+        while True:
+            reply, request_id, (text, output_path, speaker_wav) = jobs.get()
+            if not _allowed_output(output_path):
+                reply(request_id, None, "output_path must be inside static/")
+                continue
+            try:
+                cloner.synthesize(text, output_path=output_path, speaker_wav=speaker_wav)
+                reply(request_id, output_path, None)
+            except Exception as e:
+                reply(request_id, None, str(e))
+
+    threading.Thread(target=synthesize_forever, daemon=True).start()
+
+    serve_forever(address, lambda reply, request_id, payload: jobs.put((reply, request_id, payload)), "XTTS worker")
+
+
+class VoiceCloneService:
+    file_extension = "wav"
+
+    def __init__(self, address=SERVICE_ADDRESS, spawn=True, startup_timeout=600):
+        """Client for the XTTS worker; starts the worker process if none is listening.
+
+        The model and speaker latents stay resident in the worker, web threads
+        only send text over a local socket and block on their own result.
+        """
+        self._client = RpcClient(address, __file__ if spawn else None, startup_timeout)
+        print("✓ XTTS worker ready")
+
+    def generate_voice(self, text, output_path="static/response.wav", speaker_wav=None, timeout=300):
+        """Same contract as VoiceClonerGTTS.generate_voice: path on success, None on failure"""
+        try:
+            self._client.call((text, os.path.abspath(output_path), speaker_wav), timeout=timeout)
+        except RpcError as e:
+            print(f"❌ Error: {e}")
+            return None
+        return output_path
+
+    def close(self):
+        self._client.close()
+
+
+def open_voice_cloner():
+    """The TTS backend picked by VOICE_BACKEND: gTTS by default, "xtts" for the XTTS worker"""
+    if os.getenv("VOICE_BACKEND", "gtts") == "xtts":
+        return VoiceCloneService()
+    from voice_clone_gtts import VoiceClonerGTTS
+    return VoiceClonerGTTS()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        serve()
+    else:
+        service = VoiceCloneService()
+        os.makedirs("static", exist_ok=True)
+        text = "Namaste students! Aaj hum DBMS ke normalization ke baare mein seekhenge."
+        start = time.time()
+        print(service.generate_voice(text, "static/test_xtts.wav"), f"{time.time() - start:.2f}s")